@@ -8,43 +8,572 @@ to analyze website screenshots for penetration testing and security assessments.
 """
 
 import os
-import json
+import random
+import sys
 import argparse
+import csv
 import base64
+import hashlib
+import io
+import math
+import mmap
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Callable, BinaryIO, Sequence, Generator
+import asyncio
+import contextlib
 import concurrent.futures
 
 try:
     import requests
-    from openai import OpenAI
+    import httpx
+    import orjson
+    from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError
     from tqdm import tqdm
     from rich.console import Console
     from rich.table import Table
+    from PIL import Image
+    from pydantic import BaseModel
 except ImportError:
-    print("Please install required packages: pip install openai requests tqdm rich")
+    print("Please install required packages: pip install openai requests tqdm rich pillow orjson pydantic")
     exit(1)
 
-console = Console()
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Status and error messages go to stderr so stdout carries only the results (JSON Lines, CSV, ...)
+console = Console(stderr=True)
+
+# Bump whenever the prompt or response format changes so stale cache entries are ignored
+PROMPT_VERSION = "v4"
+
+# Sent byte-identical on every request, ahead of any per-image content, so the provider's
+# prompt cache can reuse the whole prefix
+SYSTEM_PROMPT = (
+    "You are an expert web penetration tester: for each website screenshot, in order, report whether "
+    "it looks old (outdated design, broken CSS), shows a login page, is a full webapp, is a custom 404 "
+    "page or is a parked domain, each with a confidence between 0 and 1, plus the likely technologies "
+    "and any visible security issues."
+)
+# With the schema enforced by structured outputs, small models do as well with just the keys
+TERSE_SYSTEM_PROMPT = (
+    "Website screenshot triage for pentesters. Per screenshot, in order: old_looking, login_page, "
+    "webapp, custom_404, parked_domain, technologies, security_issues."
+)
+USER_PROMPT = "Analyze each website screenshot below:"
+PROMPT_CACHE_KEY = "jwst-" + PROMPT_VERSION
+
+DEFAULT_CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "jwst" / "results.sqlite3"
+
+
+class ResultCache:
+    """Persistent on-disk cache of analysis results keyed by image content."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result under key."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, orjson.dumps(value)))
+
+
+# Keep enough pooled keep-alive connections for high concurrency so requests don't pay a fresh TLS handshake
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+def system_prompt_for(model: str) -> str:
+    """Select the system prompt specialized for a model.
+    
+    Args:
+        model: OpenAI model name
+        
+    Returns:
+        The terse prompt for "-mini" models, the full prompt otherwise
+    """
+    # Match "mini" as a dash-separated name component (gpt-4o-mini, gpt-4o-mini-2024-07-18,
+    # o4-mini) rather than as a substring, which would also match e.g. "gemini"
+    return TERSE_SYSTEM_PROMPT if "mini" in model.lower().split("-") else SYSTEM_PROMPT
+
+
+class Detection(BaseModel):
+    """A single yes/no feature with the model's confidence."""
+    detected: bool
+    confidence: float
+
+
+class ScreenshotAnalysis(BaseModel):
+    """Analysis of one screenshot, enforced as the response schema via structured outputs."""
+    old_looking: Detection
+    login_page: Detection
+    webapp: Detection
+    custom_404: Detection
+    parked_domain: Detection
+    technologies: List[str]
+    security_issues: List[str]
+
+
+class BatchAnalysis(BaseModel):
+    """Analyses for every screenshot in a request, in request order."""
+    results: List[ScreenshotAnalysis]
+
+
+# API failures that may be retried, how many attempts to make in total and the longest wait between them
+RETRYABLE_ERRORS = (APIConnectionError, APIStatusError)
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429})
+MAX_ATTEMPTS = 6
+MAX_RETRY_DELAY = 60.0
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether a failed request is worth retrying, following the OpenAI SDK's own rules.
+    
+    Args:
+        error: Exception raised by the failed attempt
+        
+    Returns:
+        True for connection errors and timeouts, and for 408, 409, 429 and 5xx responses
+        unless the server sent "x-should-retry: false"
+    """
+    if isinstance(error, APIConnectionError):
+        return True
+    if not isinstance(error, APIStatusError):
+        return False
+    # The server can say explicitly whether to retry, e.g. not when a quota is exhausted
+    should_retry = error.response.headers.get("x-should-retry")
+    if should_retry in ("true", "false"):
+        return should_retry == "true"
+    return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Compute how long to wait before retrying a failed request.
+    
+    Honors the server's Retry-After headers when present (clamped to between 0 and
+    MAX_RETRY_DELAY seconds), otherwise uses randomized exponential backoff between 1 and
+    MAX_RETRY_DELAY seconds.
+    
+    Args:
+        error: Exception raised by the failed attempt
+        attempt: Zero-based number of the failed attempt
+        
+    Returns:
+        Delay in seconds
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+            try:
+                return min(MAX_RETRY_DELAY, max(0.0, float(response.headers[header]) / scale))
+            except (KeyError, ValueError):
+                continue
+    return max(1.0, random.uniform(0, min(MAX_RETRY_DELAY, 2.0 ** (attempt + 1))))
+
+
+# Detection features reported with a boolean 'detected' flag and a 'confidence' score
+DETECTION_KEYS = ("old_looking", "login_page", "webapp", "custom_404", "parked_domain")
+
+# Shared read-only stand-in for a missing detection, so lookups don't allocate a default dict
+EMPTY_DETECTION = MappingProxyType({"detected": False, "confidence": 0.0})
+
+# Columns of the flattened per-screenshot rows used for table and CSV output
+FLAT_COLUMNS = (
+    ("filename", "error")
+    + tuple(f"{key}_{field}" for key in DETECTION_KEYS for field in ("detected", "confidence"))
+    + ("technologies", "security_issues")
+)
+
+
+def flatten_result(filename: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a nested analysis result into a row keyed by FLAT_COLUMNS.
+    
+    Args:
+        filename: Screenshot filename
+        result: Analysis result
+        
+    Returns:
+        Row with filename, error, <feature>_detected/<feature>_confidence for each detection,
+        technologies and security_issues
+    """
+    row = {"filename": filename, "error": result.get("error", "")}
+    for key in DETECTION_KEYS:
+        detection = result.get(key) or EMPTY_DETECTION
+        row[f"{key}_detected"] = bool(detection.get("detected"))
+        row[f"{key}_confidence"] = float(detection.get("confidence", 0))
+    row["technologies"] = result.get("technologies") or []
+    row["security_issues"] = result.get("security_issues") or []
+    return row
+
+
+# With detail="auto", low-detail results with a confidence in this range are re-queried at high detail
+AMBIGUOUS_CONFIDENCE = (0.4, 0.6)
+
+# (base tokens, tokens per 512px tile) charged per image by tile-priced models, by model name prefix;
+# any other model is priced like gpt-4o
+IMAGE_TILE_COSTS = (
+    ("gpt-4o-mini", (2833, 5667)),
+    ("o1", (75, 150)),
+    ("o3", (75, 150)),
+)
+DEFAULT_IMAGE_TILE_COST = (85, 170)
+
+# Token multiplier per 32px patch charged by patch-priced models, by model name prefix
+IMAGE_PATCH_MULTIPLIERS = (
+    ("gpt-4.1-mini", 1.62),
+    ("gpt-4.1-nano", 2.46),
+    ("o4-mini", 1.72),
+)
+MAX_IMAGE_PATCHES = 1536
+
+
+def text_tokens(text: str) -> int:
+    """Estimate the tokens of English text, at about 4 characters per token."""
+    return math.ceil(len(text) / 4)
+
+
+def image_tokens(model: str, detail: str = "high", width: Optional[int] = None,
+                 height: Optional[int] = None) -> int:
+    """Estimate the prompt tokens OpenAI charges for an image.
+    
+    Args:
+        model: OpenAI model name
+        detail: Image detail level ("low" or "high")
+        width: Image width in pixels (worst case if unknown)
+        height: Image height in pixels (worst case if unknown)
+        
+    Returns:
+        Estimated number of tokens
+    """
+    model = model.lower()
+    if width is None or height is None:
+        width, height = 768, 2048
+    for prefix, multiplier in IMAGE_PATCH_MULTIPLIERS:
+        if model.startswith(prefix):
+            # Patch-priced models ignore the detail level
+            patches = min(MAX_IMAGE_PATCHES, math.ceil(width / 32) * math.ceil(height / 32))
+            return math.ceil(patches * multiplier)
+    base, tile = next((cost for prefix, cost in IMAGE_TILE_COSTS if model.startswith(prefix)),
+                      DEFAULT_IMAGE_TILE_COST)
+    if detail == "low":
+        return base
+    # Fit within 2048x2048, then scale the shortest side down to 768 and count 512px tiles
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return base + tile * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def file_sha256(file_path: str) -> str:
+    """Compute the SHA-256 hex digest of a file, streaming it from disk.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Hex digest of the file content
+    """
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def group_identical_files(files: List[Path],
+                          max_workers: int = 8) -> Tuple[Dict[Path, List[Path]], Dict[Path, Optional[str]]]:
+    """Group byte-identical files by SHA-256 digest.
+    
+    Args:
+        files: Files to group
+        max_workers: Number of threads used to hash files
+        
+    Returns:
+        Tuple of (dictionary mapping each group's representative file to all files in the group,
+        dictionary mapping each representative to its digest, or None if it could not be read)
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(file_sha256, str(file)) for file in files]
+    
+    groups = {}
+    digests = {}
+    by_hash = {}
+    for file, future in zip(files, futures):
+        try:
+            digest = future.result()
+        except Exception:
+            # Unreadable files are analyzed on their own and reported as errors there
+            groups[file] = [file]
+            digests[file] = None
+            continue
+        if digest in by_hash:
+            groups[by_hash[digest]].append(file)
+        else:
+            by_hash[digest] = file
+            groups[file] = [file]
+            digests[file] = digest
+    return groups, digests
+
+
+# Side of the perceptual hash grid; the hash has HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# Images where fewer neighbouring cells of the hash grid differ (in either direction) are mostly
+# uniform, like sparse text on a plain background; different pages of that kind hash close
+# together, so they are never matched fuzzily
+MIN_HASH_DETAIL = 12
+
+
+def popcount(value: int) -> int:
+    """Count the set bits of a non-negative integer."""
+    return value.bit_count() if hasattr(value, "bit_count") else bin(value).count("1")
+
+
+def perceptual_hash(image: "Image.Image") -> Optional[int]:
+    """Compute a 256-bit difference hash (dHash) of an image.
+    
+    Visually near-identical images have hashes within a small Hamming distance of each other.
+    
+    Args:
+        image: Decoded image
+        
+    Returns:
+        256-bit perceptual hash, or None if the image has too little detail (see MIN_HASH_DETAIL)
+        for its hash to tell it apart from other pages
+    """
+    if image.mode not in ("L", "RGB", "RGBA"):
+        image = image.convert("RGB")
+    # Shrink before converting to grayscale so no full-size copy of the image is made
+    pixels = image.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS, reducing_gap=2.0).convert("L").tobytes()
+    bits = 0
+    detail = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            left, right = pixels[offset + col], pixels[offset + col + 1]
+            bits = (bits << 1) | (left < right)
+            detail += left != right
+    return bits if detail >= MIN_HASH_DETAIL else None
+
+
+def _band_masks(bands: int) -> List[Tuple[int, int]]:
+    """Split the hash bits into contiguous bands, as (shift, mask) pairs."""
+    masks = []
+    start = 0
+    for band in range(bands):
+        width = HASH_BITS // bands + (band < HASH_BITS % bands)
+        masks.append((start, (1 << width) - 1))
+        start += width
+    return masks
+
+
+def group_similar_images(hashes: Dict[Path, Optional[int]], max_distance: int) -> Dict[Path, List[Path]]:
+    """Group visually near-identical images by perceptual hash.
+    
+    Args:
+        hashes: Perceptual hash of each image, or None if it could not be hashed (such images
+            are never grouped)
+        max_distance: Maximum Hamming distance between hashes of images in the same group
+        
+    Returns:
+        Dictionary mapping each group's representative image to all images in the group
+    """
+    # Two hashes within max_distance bits of each other agree exactly on at least one of
+    # max_distance + 1 bands, so only representatives sharing a band value need comparing
+    masks = _band_masks(min(max_distance + 1, HASH_BITS))
+    index = [{} for _ in masks]  # per band: band value -> [(hash, representative)]
+    groups = {}
+    for img_file, phash in hashes.items():
+        groups[img_file] = [img_file]
+        # Unreadable and low-detail images are analyzed on their own
+        if phash is None:
+            continue
+        
+        representative = None
+        for (shift, mask), band_index in zip(masks, index):
+            for rep_hash, candidate in band_index.get((phash >> shift) & mask, ()):
+                if popcount(phash ^ rep_hash) <= max_distance:
+                    representative = candidate
+                    break
+            if representative is not None:
+                break
+        
+        if representative is not None:
+            del groups[img_file]
+            groups[representative].append(img_file)
+        else:
+            for (shift, mask), band_index in zip(masks, index):
+                band_index.setdefault((phash >> shift) & mask, []).append((phash, img_file))
+    return groups
+
+
+class RateLimiter:
+    """Proactive token bucket keeping requests under the account's RPM/TPM limits."""
+    
+    def __init__(self, max_rpm: Optional[int] = None, max_tpm: Optional[int] = None):
+        """Initialize the limiter with full buckets.
+        
+        Args:
+            max_rpm: Maximum requests per minute (None for unlimited)
+            max_tpm: Maximum tokens per minute (None for unlimited)
+        """
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.available_request_capacity = float(max_rpm or 0)
+        self.available_token_capacity = float(max_tpm or 0)
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        if self.max_rpm:
+            self.available_request_capacity = min(
+                self.max_rpm, self.available_request_capacity + elapsed * self.max_rpm / 60)
+        if self.max_tpm:
+            self.available_token_capacity = min(
+                self.max_tpm, self.available_token_capacity + elapsed * self.max_tpm / 60)
+    
+    async def acquire(self, tokens: int) -> None:
+        """Wait until there is capacity for one request of the given size, then consume it.
+        
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        if self.max_tpm:
+            tokens = min(tokens, self.max_tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.max_rpm and self.available_request_capacity < 1:
+                    wait = (1 - self.available_request_capacity) * 60 / self.max_rpm
+                if self.max_tpm and self.available_token_capacity < tokens:
+                    wait = max(wait, (tokens - self.available_token_capacity) * 60 / self.max_tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.max_rpm:
+                self.available_request_capacity -= 1
+            if self.max_tpm:
+                self.available_token_capacity -= tokens
+
+
+class ResultWriter:
+    """Writes analysis results to a stream as they complete, as one JSON object or as JSON Lines."""
+    
+    def __init__(self, stream: BinaryIO, json_lines: bool = False):
+        """Initialize the writer.
+        
+        Args:
+            stream: Binary stream to write to
+            json_lines: Write one {"file": ..., "result": ...} object per line instead of a single JSON object
+        """
+        self.stream = stream
+        self.json_lines = json_lines
+        self._count = 0
+    
+    def write(self, filename: str, result: Dict[str, Any]) -> None:
+        """Write a single result and flush it so consumers can read it immediately."""
+        if self.json_lines:
+            self.stream.write(orjson.dumps({"file": filename, "result": result}) + b"\n")
+        else:
+            # Match the layout of orjson.dumps(results, option=OPT_INDENT_2) for the whole object
+            entry = orjson.dumps(result, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+            self.stream.write((b",\n  " if self._count else b"{\n  ") + orjson.dumps(filename) + b": " + entry)
+        self._count += 1
+        self.stream.flush()
+    
+    def close(self) -> None:
+        """Terminate the JSON object (the underlying stream is left open)."""
+        if not self.json_lines:
+            self.stream.write(b"\n}" if self._count else b"{}")
+        self.stream.flush()
+
 
 class JWST:
     """Class to analyze website screenshots using OpenAI's Vision capabilities."""
     
-    SUPPORTED_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+    SUPPORTED_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.webp'})
+    
+    # OpenAI resizes larger images server-side anyway, so anything bigger is wasted upload
+    MAX_IMAGE_SIZE = (2048, 2048)
+    JPEG_QUALITY = 85
+    
+    MAX_TOKENS_PER_IMAGE = 800
+    
+    # Screenshots whose pixels all lie within this many levels of each other in every band are a
+    # single solid colour, and not worth an API call
+    BLANK_TOLERANCE = 2
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    # JPEGs are screened for blankness and hashed from a reduced decode of at least this size
+    SCREEN_SIZE = (256, 256)
+    
+    # Threads reading and encoding images ahead of the API workers
+    IO_WORKERS = 4
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini",
+                 use_cache: bool = True, max_rpm: Optional[int] = None, max_tpm: Optional[int] = None,
+                 detail: str = "low"):
         """Initialize the JWST class.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY environment variable)
             model: OpenAI model to use
+            detail: Image detail level ("low", "high", or "auto" to re-query ambiguous
+                low-detail results at high detail)
+            use_cache: Reuse results for previously analyzed images from the on-disk cache
+            max_rpm: Requests-per-minute limit to stay under when analyzing directories
+            max_tpm: Tokens-per-minute limit to stay under when analyzing directories
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        # Retries are handled by _request so Retry-After is honored precisely
+        self.client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(limits=HTTP_LIMITS, http2=HTTP2_AVAILABLE, timeout=HTTP_TIMEOUT)
+        )
         self.model = model
+        self.detail = detail
+        # The prompt is fixed per model, so build the shared message parts once; requests only
+        # append the per-call image parts
+        self._system_message = {"role": "system", "content": system_prompt_for(model)}
+        self._user_text = {"type": "text", "text": USER_PROMPT}
+        # Every request also carries the response schema enforced by structured outputs
+        self._prompt_tokens = (text_tokens(self._system_message["content"]) + text_tokens(USER_PROMPT)
+                               + text_tokens(orjson.dumps(BatchAnalysis.model_json_schema()).decode()))
+        self.cache = ResultCache() if use_cache else None
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
         
     @staticmethod
     def encode_image(image_path: str) -> str:
-        """Encode image as base64 string.
+        """Encode image as a downscaled JPEG base64 string.
         
         Args:
             image_path: Path to the image
@@ -52,8 +581,308 @@ class JWST:
         Returns:
             Base64 encoded image
         """
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+        # Decode straight from a read-only mapping so the original file is never
+        # copied into a Python bytes object
+        try:
+            with open(image_path, "rb") as image_file, \
+                    mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                img = JWST._load_downscaled(mapped)
+        except ValueError:
+            # mmap rejects empty files and seeks past the end, which hides Pillow's
+            # "cannot identify image file" error; reopen by path so it is reported properly
+            img = JWST._load_downscaled(image_path)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=JWST.JPEG_QUALITY, optimize=True)
+        # Encode from a view of the buffer rather than a getvalue() copy
+        with buf.getbuffer() as view:
+            return base64.b64encode(view).decode('ascii')
+    
+    @staticmethod
+    def _load_downscaled(source: Any) -> "Image.Image":
+        """Decode an image from a path or file object, fit it within MAX_IMAGE_SIZE and convert to RGB."""
+        with Image.open(source) as img:
+            img.thumbnail(JWST.MAX_IMAGE_SIZE, Image.LANCZOS)
+            return img.convert("RGB")
+    
+    def cache_key(self, digest: str) -> str:
+        """Build the cache key for an image digest under the current model and prompt."""
+        return f"{self.model}:{self.detail}:{digest}:{PROMPT_VERSION}"
+    
+    def _build_request(self, base64_images: List[str], detail: str) -> Dict[str, Any]:
+        """Build the chat completion arguments for a batch of screenshots.
+        
+        Args:
+            base64_images: Base64 encoded images, analyzed in order
+            detail: Image detail level ("low" or "high")
+            
+        Returns:
+            Keyword arguments for ``beta.chat.completions.parse``
+        """
+        return dict(
+            model=self.model,
+            messages=[
+                self._system_message,
+                {
+                    "role": "user",
+                    "content": [self._user_text] + [
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}",
+                                "detail": detail
+                            }
+                        }
+                        for base64_image in base64_images
+                    ]
+                }
+            ],
+            max_tokens=self.MAX_TOKENS_PER_IMAGE * len(base64_images),
+            response_format=BatchAnalysis,
+            extra_body={"prompt_cache_key": PROMPT_CACHE_KEY}
+        )
+    
+    def _cached_result(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an image digest, if any."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache_key(digest))
+    
+    def _store_result(self, digest: str, result: Dict[str, Any]) -> None:
+        """Store a successful result in the cache."""
+        if self.cache is not None:
+            self.cache.set(self.cache_key(digest), result)
+    
+    @staticmethod
+    def _parse_response(response: Any, expected: int) -> List[Dict[str, Any]]:
+        """Extract the per-screenshot analyses from a parsed chat completion response.
+        
+        Args:
+            response: Parsed chat completion response
+            expected: Number of screenshots sent in the request
+            
+        Returns:
+            List of analysis results, in request order
+        """
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"Model refused to analyze the screenshots: {message.refusal}")
+        results = message.parsed.results
+        if len(results) != expected:
+            raise ValueError(f"Expected {expected} results in response, got {len(results)}")
+        return [result.model_dump() for result in results]
+    
+    @staticmethod
+    def _is_ambiguous(result: Dict[str, Any]) -> bool:
+        """Check whether any detection has a confidence too close to call."""
+        low, high = AMBIGUOUS_CONFIDENCE
+        return any(low <= (result.get(key) or EMPTY_DETECTION).get("confidence", 0) <= high
+                   for key in DETECTION_KEYS)
+    
+    def _initial_detail(self) -> str:
+        """Detail level for the first request; "auto" starts low and escalates if needed."""
+        return "low" if self.detail == "auto" else self.detail
+    
+    def _ambiguous_indices(self, results: List[Dict[str, Any]]) -> List[int]:
+        """Indices of results to re-query at high detail."""
+        if self.detail != "auto":
+            return []
+        return [i for i, result in enumerate(results) if self._is_ambiguous(result)]
+    
+    @staticmethod
+    def _error_result(image_path: str, error: Exception) -> Dict[str, Any]:
+        """Report an analysis failure and build the corresponding result entry."""
+        console.print(f"[bold red]Error analyzing {image_path}: {str(error)}[/bold red]")
+        return {
+            "error": str(error),
+            "filename": os.path.basename(image_path)
+        }
+    
+    @staticmethod
+    def _screen(image_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """Classify blank (solid-color) screenshots and hash the rest, from a single decode.
+        
+        The image is examined in its own mode, without a full-size RGB copy.
+        
+        Args:
+            image_path: Path to the screenshot
+            
+        Returns:
+            Tuple of the result entry for a blank screenshot (None if it needs a real analysis)
+            and its perceptual hash (None if it is blank, unreadable or has too little detail)
+        """
+        try:
+            with Image.open(image_path) as img:
+                img.draft(img.mode, JWST.SCREEN_SIZE)
+                extrema = img.getextrema()
+                if len(img.getbands()) == 1:
+                    extrema = (extrema,)
+                if all(high - low <= JWST.BLANK_TOLERANCE for low, high in extrema):
+                    return {
+                        "error": "blank_image",
+                        "filename": os.path.basename(image_path)
+                    }, None
+                return None, perceptual_hash(img)
+        except Exception:
+            # Let the regular analysis path report unreadable images
+            return None, None
+    
+    def _prepare_batch(self, image_paths: List[str], digests: Optional[Dict[str, Optional[str]]] = None
+                       ) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str, str]]]:
+        """Resolve cache hits for a batch of screenshots and encode the rest.
+        
+        Files are hashed first so cache hits never pay for decoding and re-encoding.
+        
+        Args:
+            image_paths: Paths to the screenshots
+            digests: Digests already computed by the caller, keyed by path; those screenshots have
+                already been checked against the cache and are only encoded
+            
+        Returns:
+            Tuple of (results already known, keyed by path; (path, base64 image, digest) still to analyze)
+        """
+        results = {}
+        pending = []
+        for image_path in image_paths:
+            try:
+                digest = digests.get(image_path) if digests else None
+                if digest is None:
+                    digest = file_sha256(image_path)
+                    cached = self._cached_result(digest)
+                    if cached is not None:
+                        results[image_path] = cached
+                        continue
+                pending.append((image_path, self.encode_image(image_path), digest))
+            except Exception as e:
+                results[image_path] = self._error_result(image_path, e)
+        return results, pending
+    
+    def _finish_batch(self, results: Dict[str, Dict[str, Any]], pending: List[Tuple[str, str, str]],
+                      analyses: List[Dict[str, Any]], uncached: Sequence[int] = ()) -> None:
+        """Record fresh analyses for the pending screenshots and cache them.
+        
+        Args:
+            results: Results for the batch, keyed by path (updated in place)
+            pending: (path, base64 image, digest) of the screenshots that were analyzed
+            analyses: Analysis results, in the same order as pending
+            uncached: Indices of provisional results to return but not cache
+        """
+        for i, ((image_path, _, digest), result) in enumerate(zip(pending, analyses)):
+            if i not in uncached:
+                self._store_result(digest, result)
+            results[image_path] = result
+    
+    @staticmethod
+    def _escalation_failed(pending: List[Tuple[str, str, str]], ambiguous: List[int], error: Exception) -> None:
+        """Report a failed high-detail re-query; the low-detail results are kept."""
+        for i in ambiguous:
+            console.print(f"[bold yellow]High-detail re-query failed for {pending[i][0]}, "
+                          f"keeping low-detail result: {str(error)}[/bold yellow]")
+    
+    @staticmethod
+    def _retry_wait(error: Exception, attempt: int) -> float:
+        """Re-raise a failed attempt that should not be retried, else return how long to wait.
+        
+        Args:
+            error: Exception raised by the failed attempt
+            attempt: Zero-based number of the failed attempt
+            
+        Returns:
+            Delay in seconds before the next attempt
+        """
+        if attempt == MAX_ATTEMPTS - 1 or not is_retryable(error):
+            raise error
+        return retry_delay(error, attempt)
+    
+    def _request_tokens(self, images: int, detail: str) -> int:
+        """Estimate the tokens a request counts against the TPM limit.
+        
+        OpenAI counts a request's max_tokens up front, on top of its prompt tokens.
+        
+        Args:
+            images: Number of screenshots in the request
+            detail: Image detail level ("low" or "high")
+            
+        Returns:
+            Estimated number of tokens
+        """
+        return self._prompt_tokens + images * (image_tokens(self.model, detail) + self.MAX_TOKENS_PER_IMAGE)
+    
+    def _request(self, base64_images: List[str], detail: str) -> List[Dict[str, Any]]:
+        """Send one analysis request, retrying transient failures.
+        
+        Args:
+            base64_images: Base64 encoded images, analyzed in order
+            detail: Image detail level ("low" or "high")
+            
+        Returns:
+            List of analysis results, in request order
+        """
+        request = self._build_request(base64_images, detail)
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.client.beta.chat.completions.parse(**request)
+                break
+            except RETRYABLE_ERRORS as e:
+                time.sleep(self._retry_wait(e, attempt))
+        return self._parse_response(response, len(base64_images))
+    
+    async def _request_async(self, aclient: AsyncOpenAI, limiter: RateLimiter,
+                             base64_images: List[str], detail: str) -> List[Dict[str, Any]]:
+        """Send one analysis request without blocking the event loop, retrying transient failures.
+        
+        Args:
+            aclient: Async OpenAI client to send the request with
+            limiter: Rate limiter shared by all requests
+            base64_images: Base64 encoded images, analyzed in order
+            detail: Image detail level ("low" or "high")
+            
+        Returns:
+            List of analysis results, in request order
+        """
+        request = self._build_request(base64_images, detail)
+        tokens = self._request_tokens(len(base64_images), detail)
+        for attempt in range(MAX_ATTEMPTS):
+            await limiter.acquire(tokens)
+            try:
+                response = await aclient.beta.chat.completions.parse(**request)
+                break
+            except RETRYABLE_ERRORS as e:
+                await asyncio.sleep(self._retry_wait(e, attempt))
+        return self._parse_response(response, len(base64_images))
+    
+    def _analysis_steps(self, results: Dict[str, Dict[str, Any]], pending: List[Tuple[str, str, str]]
+                        ) -> Generator[Tuple[List[str], str], List[Dict[str, Any]], None]:
+        """Analyze an already encoded batch of screenshots, independently of how requests are sent.
+        
+        Yields the (base64 images, detail) of each request to send; the caller sends it and passes
+        the analyses back with send(), or the exception it raised with throw(), so the sync and
+        async paths share the escalation, caching and error handling.
+        
+        Args:
+            results: Results already known for the batch (cache hits and encoding errors), keyed by
+                path; updated in place with the results of the pending screenshots
+            pending: (path, base64 image, digest) of screenshots still to analyze
+        """
+        if not pending:
+            return
+        try:
+            base64_images = [base64_image for _, base64_image, _ in pending]
+            analyses = yield base64_images, self._initial_detail()
+            
+            ambiguous = self._ambiguous_indices(analyses)
+            if ambiguous:
+                try:
+                    retried = yield [base64_images[i] for i in ambiguous], "high"
+                    for i, result in zip(ambiguous, retried):
+                        analyses[i] = result
+                    ambiguous = []
+                except Exception as e:
+                    self._escalation_failed(pending, ambiguous, e)
+            
+            self._finish_batch(results, pending, analyses, uncached=ambiguous)
+        except Exception as e:
+            for image_path, _, _ in pending:
+                results[image_path] = self._error_result(image_path, e)
     
     def analyze_screenshot(self, image_path: str) -> Dict[str, Any]:
         """Analyze a screenshot using OpenAI's Vision capabilities.
@@ -64,78 +893,137 @@ class JWST:
         Returns:
             Dictionary containing analysis results
         """
-        base64_image = self.encode_image(image_path)
+        return self.analyze_batch([image_path])[0]
+    
+    def analyze_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """Analyze several screenshots with a single API request.
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert web penetration tester analyzing website screenshots. "
-                            "Identify the following features with yes/no and confidence score (0-1):\n"
-                            "1. Is it an old-looking site? (outdated design, broken CSS, early 2000s look)\n"
-                            "2. Is there a login page? (look for input fields, username/password prompts)\n"
-                            "3. Is it a full webapp? (complex functionality beyond basic pages)\n"
-                            "4. Is it a custom 404 page? (error page with custom styling)\n"
-                            "5. Is it a parked domain? (placeholder page with ads, no real functionality)\n"
-                            "6. What technologies are likely being used? (frameworks, CMS, etc.)\n"
-                            "7. Are there any obvious security issues visible?\n\n"
-                            "Format your response as a JSON with these keys: old_looking, login_page, webapp, "
-                            "custom_404, parked_domain, technologies, security_issues. For each feature except "
-                            "'technologies' and 'security_issues', include a boolean 'detected' field and a float "
-                            "'confidence' field between 0 and 1. For 'technologies' and 'security_issues', provide lists."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Analyze this website screenshot and provide the requested information as JSON:"
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=800,
-                response_format={"type": "json_object"}
-            )
+        Args:
+            image_paths: Paths to the screenshots
             
-            result = json.loads(response.choices[0].message.content)
-            return result
+        Returns:
+            List of dictionaries containing analysis results, in the same order as image_paths
+        """
+        results, pending = self._prepare_batch(image_paths)
+        steps = self._analysis_steps(results, pending)
+        try:
+            request = next(steps)
+            while True:
+                try:
+                    analyses = self._request(*request)
+                except Exception as e:
+                    request = steps.throw(e)
+                else:
+                    request = steps.send(analyses)
+        except StopIteration:
+            pass
+        return [results[image_path] for image_path in image_paths]
+    
+    async def _analyze_prepared_async(self, results: Dict[str, Dict[str, Any]],
+                                      pending: List[Tuple[str, str, str]], aclient: AsyncOpenAI,
+                                      limiter: RateLimiter) -> Dict[str, Dict[str, Any]]:
+        """Analyze an already encoded batch of screenshots without blocking the event loop.
+        
+        Args:
+            results: Results already known for the batch (cache hits and encoding errors), keyed by path
+            pending: (path, base64 image, digest) of screenshots still to analyze
+            aclient: Async OpenAI client to send the request with
+            limiter: Rate limiter shared by all requests
             
-        except Exception as e:
-            console.print(f"[bold red]Error analyzing {image_path}: {str(e)}[/bold red]")
-            return {
-                "error": str(e),
-                "filename": os.path.basename(image_path)
-            }
+        Returns:
+            Dictionary mapping image paths to analysis results
+        """
+        steps = self._analysis_steps(results, pending)
+        try:
+            request = next(steps)
+            while True:
+                try:
+                    analyses = await self._request_async(aclient, limiter, *request)
+                except Exception as e:
+                    request = steps.throw(e)
+                else:
+                    request = steps.send(analyses)
+        except StopIteration:
+            pass
+        return results
+    
+    async def _analyze_files(self, image_files: List[Path], max_concurrency: int, batch_size: int,
+                             on_result: Callable[[str, Dict[str, Any]], None],
+                             digests: Optional[Dict[str, Optional[str]]] = None) -> None:
+        """Analyze screenshots concurrently on a single event loop.
+        
+        Reading and encoding images runs on a small pool of I/O threads that fills a bounded
+        queue ahead of the API workers, so disk reads and base64 overlap with in-flight requests.
+        
+        Args:
+            image_files: Screenshots to analyze
+            max_concurrency: Maximum number of in-flight API requests
+            batch_size: Number of screenshots sent per API request
+            on_result: Called with (filename, result) as soon as each result is available
+            digests: Digests of screenshots already checked against the cache, keyed by path
+        """
+        loop = asyncio.get_running_loop()
+        limiter = RateLimiter(self.max_rpm, self.max_tpm)
+        aclient = AsyncOpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=HTTP_LIMITS, http2=HTTP2_AVAILABLE, timeout=HTTP_TIMEOUT)
+        )
+        image_paths = [str(img_file) for img_file in image_files]
+        batches = iter([image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)])
+        queue = asyncio.Queue(maxsize=2 * max_concurrency)
+        io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.IO_WORKERS)
+        
+        async def prefetch() -> None:
+            for batch in batches:
+                await queue.put(await loop.run_in_executor(io_executor, self._prepare_batch, batch, digests))
+        
+        async def feed() -> None:
+            await asyncio.gather(*(prefetch() for _ in range(self.IO_WORKERS)))
+            for _ in range(max_concurrency):
+                await queue.put(None)
+        
+        async def work(progress: tqdm) -> None:
+            while True:
+                prepared = await queue.get()
+                if prepared is None:
+                    return
+                batch_results = await self._analyze_prepared_async(*prepared, aclient, limiter)
+                for image_path, result in batch_results.items():
+                    on_result(os.path.basename(image_path), result)
+                progress.update(len(batch_results))
+        
+        try:
+            with tqdm(total=len(image_paths), desc="Analyzing screenshots") as progress:
+                await asyncio.gather(feed(), *(work(progress) for _ in range(max_concurrency)))
+        finally:
+            io_executor.shutdown(wait=False)
+            await aclient.close()
     
     def analyze_directory(self, directory_path: str, output_format: str = "json", 
-                          output_file: Optional[str] = None, max_workers: int = 4) -> Dict[str, Any]:
+                          output_file: Optional[str] = None, max_workers: int = 50,
+                          batch_size: int = 4, dedup_distance: Optional[int] = 4) -> Dict[str, Any]:
         """Analyze all screenshots in a directory.
         
         Args:
             directory_path: Path to directory containing screenshots
-            output_format: Output format (json or table)
+            output_format: Output format (json, jsonl, csv or table); json output to a file and jsonl
+                output are written incrementally as results complete
             output_file: Path to output file (if None, prints to stdout)
-            max_workers: Maximum number of worker threads for parallel processing
+            max_workers: Maximum number of concurrent API requests
+            batch_size: Number of screenshots sent per API request
+            dedup_distance: Maximum perceptual hash distance for screenshots to be treated as
+                duplicates and analyzed once (None to analyze every screenshot)
             
         Returns:
-            Dictionary mapping filenames to analysis results
+            Dictionary mapping filenames to analysis results (empty for jsonl, which is only streamed)
         """
-        # Find all image files in directory
-        image_files = []
-        for ext in self.SUPPORTED_EXTENSIONS:
-            image_files.extend(list(Path(directory_path).glob(f"*{ext}")))
+        # Find all image files in directory with a single listing pass
+        with os.scandir(directory_path) as entries:
+            image_files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.SUPPORTED_EXTENSIONS
+            ]
         
         if not image_files:
             console.print(f"[bold yellow]No supported image files found in {directory_path}[/bold yellow]")
@@ -143,35 +1031,102 @@ class JWST:
         
         console.print(f"[bold green]Found {len(image_files)} images to analyze[/bold green]")
         
-        # Analyze images in parallel
+        # Byte-identical files only need to be processed once
+        identical, digests = group_identical_files(image_files)
+        if len(identical) < len(image_files):
+            console.print(f"[bold green]{len(identical)} unique files after removing exact duplicates[/bold green]")
+            image_files = list(identical)
+        
+        # Previously analyzed files are answered from the cache before anything is decoded
+        known = {}
+        if self.cache is not None:
+            for img_file in image_files:
+                cached = self._cached_result(digests[img_file]) if digests[img_file] else None
+                if cached is not None:
+                    known[img_file] = cached
+            if known:
+                console.print(f"[bold green]Reusing {len(known)} cached results[/bold green]")
+                image_files = [img_file for img_file in image_files if img_file not in known]
+        
+        # Blank screenshots are classified locally and never sent to the API; the same decode
+        # yields the perceptual hash used for deduplication
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            screened = dict(zip(image_files, executor.map(self._screen, map(str, image_files))))
+        trivial = {img_file: result for img_file, (result, _) in screened.items() if result is not None}
+        if trivial:
+            console.print(f"[bold green]Skipping {len(trivial)} blank images[/bold green]")
+            image_files = [img_file for img_file in image_files if img_file not in trivial]
+            known.update(trivial)
+            # Cache blank results too, so re-runs don't decode them again
+            for img_file, result in trivial.items():
+                if digests[img_file]:
+                    self._store_result(digests[img_file], result)
+        
+        # Only analyze one representative of each group of visually near-identical screenshots
+        if dedup_distance is not None:
+            groups = group_similar_images({img_file: screened[img_file][1] for img_file in image_files},
+                                          dedup_distance)
+            if len(groups) < len(image_files):
+                console.print(f"[bold green]{len(groups)} visually unique images after deduplication[/bold green]")
+        else:
+            groups = {img_file: [img_file] for img_file in image_files}
+        duplicates = {
+            os.path.basename(str(representative)): [
+                os.path.basename(str(copy)) for member in members for copy in identical[member]
+            ]
+            for representative, members in groups.items()
+        }
+        duplicates.update(
+            (os.path.basename(str(img_file)), [os.path.basename(str(copy)) for copy in identical[img_file]])
+            for img_file in known
+        )
+        
+        # Analyze images concurrently, streaming results out as they complete where possible
         results = {}
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_file = {
-                executor.submit(self.analyze_screenshot, str(img_file)): img_file 
-                for img_file in image_files
-            }
-            
-            for future in tqdm(concurrent.futures.as_completed(future_to_file), 
-                              total=len(image_files), 
-                              desc="Analyzing screenshots"):
-                img_file = future_to_file[future]
-                filename = os.path.basename(str(img_file))
-                try:
-                    results[filename] = future.result()
-                except Exception as e:
-                    console.print(f"[bold red]Error processing {filename}: {str(e)}[/bold red]")
-                    results[filename] = {"error": str(e)}
+        stream = None
+        if output_file and output_format in ("json", "jsonl"):
+            stream = open(output_file, "wb")
+        elif output_format == "jsonl":
+            stream = sys.stdout.buffer
+        writer = ResultWriter(stream, json_lines=output_format == "jsonl") if stream is not None else None
+        
+        def on_result(filename: str, result: Dict[str, Any]) -> None:
+            for member in duplicates[filename]:
+                if writer is not None:
+                    writer.write(member, result)
+                if output_format != "jsonl":
+                    results[member] = result
+        
+        try:
+            for img_file, result in known.items():
+                on_result(os.path.basename(str(img_file)), result)
+            asyncio.run(self._analyze_files(list(groups), max_workers, batch_size, on_result,
+                                            {str(img_file): digests[img_file] for img_file in groups}))
+        finally:
+            if writer is not None:
+                writer.close()
+            if output_file and stream is not None:
+                stream.close()
         
         # Output results
-        if output_format == "json":
-            output_json = json.dumps(results, indent=2)
+        if output_format in ("json", "jsonl"):
+            if output_file:
+                console.print(f"[bold green]Results saved to {output_file}[/bold green]")
+            elif output_format == "json":
+                print(orjson.dumps(results, option=orjson.OPT_INDENT_2).decode())
+        elif output_format == "csv":
+            rows = [flatten_result(filename, result) for filename, result in results.items()]
+            with (open(output_file, "w", newline="") if output_file else contextlib.nullcontext(sys.stdout)) as f:
+                csv_writer = csv.DictWriter(f, fieldnames=FLAT_COLUMNS)
+                csv_writer.writeheader()
+                for row in rows:
+                    row["technologies"] = "; ".join(row["technologies"])
+                    row["security_issues"] = "; ".join(row["security_issues"])
+                    csv_writer.writerow(row)
             if output_file:
-                with open(output_file, "w") as f:
-                    f.write(output_json)
                 console.print(f"[bold green]Results saved to {output_file}[/bold green]")
-            else:
-                print(output_json)
         else:  # table format
+            rows = [flatten_result(filename, result) for filename, result in results.items()]
             table = Table(title="Screenshot Analysis Results")
             table.add_column("Filename", style="cyan")
             table.add_column("Old Looking", style="magenta")
@@ -181,52 +1136,83 @@ class JWST:
             table.add_column("Parked", style="red")
             table.add_column("Technologies", style="bright_cyan")
             
-            for filename, result in results.items():
-                if "error" in result:
-                    table.add_row(filename, f"ERROR: {result['error']}", "", "", "", "", "")
+            for row in rows:
+                if row["error"]:
+                    table.add_row(row["filename"], f"ERROR: {row['error']}", "", "", "", "", "")
                     continue
                     
-                tech_str = ", ".join(result.get("technologies", []))[:30]
+                tech_str = ", ".join(row["technologies"])[:30]
                 if len(tech_str) == 30:
                     tech_str += "..."
                     
                 table.add_row(
-                    filename,
-                    f"{'✓' if result.get('old_looking', {}).get('detected', False) else '✗'} ({result.get('old_looking', {}).get('confidence', 0):.2f})",
-                    f"{'✓' if result.get('login_page', {}).get('detected', False) else '✗'} ({result.get('login_page', {}).get('confidence', 0):.2f})",
-                    f"{'✓' if result.get('webapp', {}).get('detected', False) else '✗'} ({result.get('webapp', {}).get('confidence', 0):.2f})",
-                    f"{'✓' if result.get('custom_404', {}).get('detected', False) else '✗'} ({result.get('custom_404', {}).get('confidence', 0):.2f})",
-                    f"{'✓' if result.get('parked_domain', {}).get('detected', False) else '✗'} ({result.get('parked_domain', {}).get('confidence', 0):.2f})",
+                    row["filename"],
+                    *[f"{'✓' if row[f'{key}_detected'] else '✗'} ({row[f'{key}_confidence']:.2f})"
+                      for key in DETECTION_KEYS],
                     tech_str
                 )
             
-            console.print(table)
+            Console().print(table)
             
             if output_file:
-                with open(output_file, "w") as f:
-                    f.write(json.dumps(results, indent=2))
+                with open(output_file, "wb") as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
                 console.print(f"[bold green]Results also saved to {output_file}[/bold green]")
         
         return results
 
 
+def positive_int(value: str) -> int:
+    """Argparse type accepting integers of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """Argparse type accepting integers of at least 0."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return number
+
+
 def main():
     """Main function to parse arguments and run the tool."""
     parser = argparse.ArgumentParser(description="JWST - Analyze website screenshots using OpenAI")
     parser.add_argument("directory", help="Directory containing website screenshots")
     parser.add_argument("--output", "-o", help="Output file (defaults to stdout)")
-    parser.add_argument("--format", "-f", choices=["json", "table"], default="json",
-                        help="Output format (json or table, defaults to json)")
+    parser.add_argument("--format", "-f", choices=["json", "jsonl", "csv", "table"], default="json",
+                        help="Output format (json, jsonl, csv or table, defaults to json)")
     parser.add_argument("--api-key", help="OpenAI API key (defaults to OPENAI_API_KEY environment variable)")
     parser.add_argument("--model", default="gpt-4o-mini", 
                        help="OpenAI model to use (defaults to gpt-4o-mini)")
-    parser.add_argument("--workers", type=int, default=4,
-                       help="Maximum number of parallel workers (defaults to 4)")
+    parser.add_argument("--workers", type=positive_int, default=50,
+                       help="Maximum number of concurrent API requests (defaults to 50)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Ignore and do not update the on-disk result cache")
+    parser.add_argument("--max-rpm", type=positive_int,
+                       help="Requests-per-minute limit of your OpenAI account (unlimited if omitted)")
+    parser.add_argument("--max-tpm", type=positive_int,
+                       help="Tokens-per-minute limit of your OpenAI account (unlimited if omitted)")
+    parser.add_argument("--batch-size", type=positive_int, default=4,
+                       help="Number of screenshots sent per API request (defaults to 4)")
+    parser.add_argument("--dedup-distance", type=non_negative_int, default=4,
+                       help="Maximum perceptual hash distance (in bits, out of 256) for screenshots "
+                            "to be analyzed once as duplicates (defaults to 4)")
+    parser.add_argument("--no-dedup", action="store_true",
+                       help="Analyze every screenshot, even visually near-identical ones")
+    parser.add_argument("--detail", choices=["low", "high", "auto"], default="low",
+                       help="Image detail level; auto re-queries ambiguous low-detail results at high "
+                            "detail (defaults to low)")
     
     args = parser.parse_args()
     
-    telescope = JWST(api_key=args.api_key, model=args.model)
-    telescope.analyze_directory(args.directory, args.format, args.output, args.workers)
+    telescope = JWST(api_key=args.api_key, model=args.model, use_cache=not args.no_cache,
+                     max_rpm=args.max_rpm, max_tpm=args.max_tpm, detail=args.detail)
+    telescope.analyze_directory(args.directory, args.format, args.output, args.workers, args.batch_size,
+                                None if args.no_dedup else args.dedup_distance)
 
 
 if __name__ == "__main__":